@@ -20,9 +20,25 @@ class AbstractParameterType(ABC):
     overridding the `deserialize_input` and `input_to_swagger` methods.
     """
 
+    # Sentinel attribute used by wrapped-item checks; probing this on the type is
+    # cheaper than an issubclass/isinstance MRO walk through ABCMeta.
+    _IS_PARAMETER_TYPE = True
+
     def __init__(self, sample_input):
         self.sample_input = sample_input
         self.sample_data_type = type(sample_input)
+        self._cached_swagger = None
+
+    @property
+    def cached_swagger(self):
+        """
+        Swagger schema for the sample input, generated on first access and reused on
+        subsequent ones. Callers that treat the schema as read-only should prefer this
+        over input_to_swagger to avoid regenerating the schema per call.
+        """
+        if self._cached_swagger is None:
+            self._cached_swagger = self.input_to_swagger()
+        return self._cached_swagger
 
     @abstractmethod
     def deserialize_input(self, input_data):
@@ -2,15 +2,73 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # ---------------------------------------------------------
 
-import base64
 import datetime
 import pytz
-import sys
-import json
+from binascii import a2b_base64, b2a_base64
 from dateutil import parser
 from .abstract_parameter_type import AbstractParameterType
 from ._constants import DATE_FORMAT, DATETIME_FORMAT, TIME_FORMAT, ERR_PYTHON_DATA_NOT_JSON_SERIALIZABLE
 
+_JSON_SCALAR = (str, int, float, bool, type(None))
+_SEQUENCE_TYPES = (list, tuple)
+_UTC = pytz.utc
+
+
+def _make_scalar_schema_builder(swagger_type, swagger_format=None):
+    """
+    Produce a schema builder for the scalar sample types whose schemas differ only by
+    swagger type and format. Specializing the builder at definition time keeps the
+    per-instance call a straight dict display with no branching.
+    """
+    if swagger_format is None:
+        def _builder(self):
+            return {"type": swagger_type, "example": self.sample_input}
+    else:
+        def _builder(self):
+            return {"type": swagger_type, "format": swagger_format, "example": self.sample_input}
+    return _builder
+
+
+def _assert_json_serializable(value):
+    """
+    Check that value only contains JSON serializable types, without paying for a full
+    json.dumps serialization. Walks containers with an explicit stack and raises
+    TypeError at the first offending element, or ValueError on a circular reference
+    (matching json.dumps behavior).
+    """
+    # Stack entries are (value, False) for nodes to visit and (container id, True)
+    # markers that remove the container from the current path once its children are
+    # done. Only the active path is tracked so schemas that share sub-dicts (e.g. a
+    # nested example referenced from both "properties" and "example") stay valid.
+    stack = [(value, False)]
+    path_ids = set()
+    while stack:
+        v, leaving = stack.pop()
+        if leaving:
+            path_ids.discard(v)
+            continue
+        if isinstance(v, _JSON_SCALAR):
+            continue
+        if isinstance(v, dict):
+            if id(v) in path_ids:
+                raise ValueError('Circular reference detected')
+            for k in v.keys():
+                if not isinstance(k, _JSON_SCALAR):
+                    raise TypeError(ERR_PYTHON_DATA_NOT_JSON_SERIALIZABLE.format(
+                        'keys must be str, int, float, bool or None, not {}'.format(type(k).__name__)))
+            path_ids.add(id(v))
+            stack.append((id(v), True))
+            stack.extend((child, False) for child in v.values())
+        elif isinstance(v, (list, tuple)):
+            if id(v) in path_ids:
+                raise ValueError('Circular reference detected')
+            path_ids.add(id(v))
+            stack.append((id(v), True))
+            stack.extend((child, False) for child in v)
+        else:
+            raise TypeError(ERR_PYTHON_DATA_NOT_JSON_SERIALIZABLE.format(
+                'Object of type {} is not JSON serializable'.format(type(v).__name__)))
+
 
 class StandardPythonParameterType(AbstractParameterType):
     """
@@ -28,17 +86,28 @@ class StandardPythonParameterType(AbstractParameterType):
         :param sample_input:
         :type sample_input:
         """
+        if sample_input is None:
+            raise ValueError("Python data cannot be None")
+
         super(StandardPythonParameterType, self).__init__(sample_input)
+        sample_data_type = self.sample_data_type
         self.sample_data_type_map = dict()
         self.sample_data_type_list = []
-        if self.sample_data_type is dict:
-            for k, v in self.sample_input.items():
-                if issubclass(type(v), AbstractParameterType):
+        if sample_data_type is dict:
+            for k, v in sample_input.items():
+                if getattr(type(v), '_IS_PARAMETER_TYPE', False):
                     self.sample_data_type_map[k] = v
-        elif self.sample_data_type is list or self.sample_data_type is tuple:
-            for data in self.sample_input:
-                if issubclass(type(data), AbstractParameterType):
+        elif sample_data_type in _SEQUENCE_TYPES:
+            for data in sample_input:
+                if getattr(type(data), '_IS_PARAMETER_TYPE', False):
                     self.sample_data_type_list.append(data)
+        # sample_data_type is fixed at construction time, so resolve the handlers for it
+        # once here instead of walking an if/elif chain on every call.
+        self._deserializer = self._DESERIALIZERS.get(sample_data_type)
+        self._schema_builder = self._SCHEMA_BUILDERS.get(sample_data_type)
+        # The sample never changes after construction, so the swagger schema can be
+        # generated (and validated) once here rather than on every call.
+        self._cached_schema = self._build_swagger()
 
     def deserialize_input(self, input_data):
         """
@@ -49,17 +118,13 @@ class StandardPythonParameterType(AbstractParameterType):
         :return:
         :rtype: varies
         """
-        if self.sample_data_type is datetime.date:
-            input_data = datetime.date.strptime(input_data, DATE_FORMAT)
-        elif self.sample_data_type is datetime.datetime:
-            input_data = parser.parse(input_data)
-        elif self.sample_data_type is datetime.time:
-            input_data = parser.parse(input_data).timetz()
-        elif self.sample_data_type is bytearray or (sys.version_info[0] == 3 and self.sample_data_type is bytes):
-            input_data = base64.b64decode(input_data.encode('utf-8'))
-        if not isinstance(input_data, self.sample_data_type):
+        deserializer = self._deserializer
+        if deserializer is not None:
+            input_data = deserializer(self, input_data)
+        sample_data_type = self.sample_data_type
+        if not isinstance(input_data, sample_data_type):
             raise ValueError("Invalid input data type to parse. Expected: {0} but got {1}".format(
-                self.sample_data_type, type(input_data)))
+                sample_data_type, type(input_data)))
 
         return input_data
 
@@ -70,98 +135,130 @@ class StandardPythonParameterType(AbstractParameterType):
         :return: The swagger schema object.
         :rtype: dict
         """
-        if self.sample_input is None:
-            raise ValueError("Python data cannot be None")
+        return self._cached_schema
 
-        schema = None
-
-        if self.sample_data_type is int:
-            schema = {"type": "integer", "format": "int64", "example": self.sample_input}
-        elif self.sample_data_type is bytes:
-            # Bytes type is not json serializable so will convert to a base 64 string for the sample
-            sample = base64.b64encode(self.sample_input).decode('utf-8')
-            schema = {"type": "string", "format": "byte", "example": sample}
-        elif self.sample_data_type is range:
-            schema = self._get_swagger_for_list(self.sample_input, {"type": "integer", "format": "int64"})
-        elif self.sample_data_type is str:
-            schema = {"type": "string", "example": self.sample_input}
-        elif self.sample_data_type is float:
-            schema = {"type": "number", "format": "double", "example": self.sample_input}
-        elif self.sample_data_type is bool:
-            schema = {"type": "boolean", "example": self.sample_input}
-        elif self.sample_data_type is datetime.date:
-            sample = self.sample_input.strftime(DATE_FORMAT)
-            schema = {"type": "string", "format": "date", "example": sample}
-        elif self.sample_data_type is datetime.datetime:
-            date_time_with_zone = self.sample_input
-            if self.sample_input.tzinfo is None:
-                # If no timezone data is passed in, consider UTC
-                date_time_with_zone = datetime.datetime(self.sample_input.year, self.sample_input.month,
-                                                        self.sample_input.day, self.sample_input.hour,
-                                                        self.sample_input.minute, self.sample_input.second,
-                                                        self.sample_input.microsecond, pytz.utc)
-            sample = date_time_with_zone.strftime(DATETIME_FORMAT)
-            schema = {"type": "string", "format": "date-time", "example": sample}
-        elif self.sample_data_type is datetime.time:
-            time_with_zone = self.sample_input
-            if self.sample_input.tzinfo is None:
-                # If no timezone data is passed in, consider UTC
-                time_with_zone = datetime.time(self.sample_input.hour, self.sample_input.minute,
-                                               self.sample_input.second, self.sample_input.microsecond, pytz.utc)
-            sample = time_with_zone.strftime(TIME_FORMAT)
-            schema = {"type": "string", "format": "time", "example": sample}
-        elif self.sample_data_type is bytearray:
-            # Bytes type is not json serializable so will convert to a base 64 string for the sample
-            sample = base64.b64encode(self.sample_input).decode('utf-8')
-            schema = {"type": "string", "format": "byte", "example": sample}
-        elif self.sample_data_type is list or self.sample_data_type is tuple:
-            schema = self._get_swagger_for_list(self.sample_input)
-        elif self.sample_data_type is dict:
-            schema = self._get_swagger_for_nested_dict(self.sample_input)
-        # If we didn't match any type yet, try out best to fit this to an object
-        if schema is None:
+    def _build_swagger(self):
+        if self._schema_builder is not None:
+            schema = self._schema_builder(self)
+        else:
+            # If we don't have a handler for the type, try our best to fit this to an object
             schema = {"type": "object", "example": self.sample_input}
         # ensure the schema is JSON serializable
-        try:
-            json.dumps(schema)
-        except TypeError as te:
-            raise TypeError(ERR_PYTHON_DATA_NOT_JSON_SERIALIZABLE.format(str(te)))
+        _assert_json_serializable(schema)
 
         return schema
 
-    def _get_swagger_for_list(self, python_data):
-        schema = {"type": "array", "items": {"type": "object"}, "example": python_data}
+    def _deserialize_date(self, input_data):
+        # DATE_FORMAT is ISO 8601 (%Y-%m-%d), so the C-implemented fromisoformat applies.
+        # datetime.date has no strptime, and datetime.strptime would yield a datetime
+        # that fails the downstream sample_data_type check.
+        return datetime.date.fromisoformat(input_data)
+
+    def _deserialize_datetime(self, input_data):
+        # fromisoformat is C-implemented and covers the documented ISO 8601 wire format;
+        # fall back to the slower dateutil parser for anything else.
+        try:
+            return datetime.datetime.fromisoformat(input_data)
+        except ValueError:
+            return parser.parse(input_data)
+
+    def _deserialize_time(self, input_data):
+        try:
+            return datetime.time.fromisoformat(input_data)
+        except ValueError:
+            return parser.parse(input_data).timetz()
+
+    def _deserialize_bytes(self, input_data):
+        # a2b_base64 accepts str directly; it is the C routine b64decode wraps
+        return a2b_base64(input_data)
+
+    def _swagger_for_bytes(self):
+        # Bytes type is not json serializable so will convert to a base 64 string for the sample
+        sample = b2a_base64(self.sample_input, newline=False).decode('ascii')
+        return {"type": "string", "format": "byte", "example": sample}
+
+    def _swagger_for_range(self):
+        return self._get_swagger_for_list(list(self.sample_input), {"type": "integer", "format": "int64"})
+
+    def _swagger_for_date(self):
+        sample = self.sample_input.strftime(DATE_FORMAT)
+        return {"type": "string", "format": "date", "example": sample}
+
+    def _swagger_for_datetime(self):
+        date_time_with_zone = self.sample_input
+        if date_time_with_zone.tzinfo is None:
+            # If no timezone data is passed in, consider UTC
+            date_time_with_zone = date_time_with_zone.replace(tzinfo=_UTC)
+        sample = date_time_with_zone.strftime(DATETIME_FORMAT)
+        return {"type": "string", "format": "date-time", "example": sample}
+
+    def _swagger_for_time(self):
+        time_with_zone = self.sample_input
+        if time_with_zone.tzinfo is None:
+            # If no timezone data is passed in, consider UTC
+            time_with_zone = time_with_zone.replace(tzinfo=_UTC)
+        sample = time_with_zone.strftime(TIME_FORMAT)
+        return {"type": "string", "format": "time", "example": sample}
+
+    def _swagger_for_sequence(self):
+        return self._get_swagger_for_list(self.sample_input)
+
+    def _swagger_for_dict(self):
+        return self._get_swagger_for_nested_dict(self.sample_input)
+
+    def _get_swagger_for_list(self, python_data, item_schema=None):
+        if item_schema is None:
+            item_schema = {"type": "object"}
+        schema = {"type": "array", "items": item_schema, "example": python_data}
         if not python_data:
             return schema
         item_type = type(python_data[0])
-        for data in python_data:
-            if type(data) != item_type:
-                raise Exception('Error, OpenAPI 2.x does not support mixed type in array.')
-        if issubclass(item_type, AbstractParameterType):
-            nested_item_swagger = python_data[0].input_to_swagger()
+        # all() short-circuits in C; identity comparison avoids __eq__ dispatch on type objects
+        if not all(type(data) is item_type for data in python_data):
+            raise Exception('Error, OpenAPI 2.x does not support mixed type in array.')
+        if getattr(item_type, '_IS_PARAMETER_TYPE', False):
+            nested_item_swagger = python_data[0].cached_swagger
             schema = {"type": "array", "items": nested_item_swagger,
                       "example": [nested_item_swagger['example']]}
         return schema
 
     def _get_swagger_for_nested_dict(self, python_data):
-        nested_items = dict()
-        examples = dict()
-        required = []
-        has_wrapped_items = False
-        for k, v in python_data.items():
-            required.append(k)
-            if issubclass(type(v), AbstractParameterType):
-                has_wrapped_items = True
-                nested_items_swagger = v.input_to_swagger()
-                nested_items[k] = nested_items_swagger
-                examples[k] = nested_items_swagger["example"]
-            else:
-                nested_items[k] = {'type': 'object'}
-                examples[k] = v
-        if has_wrapped_items:
-            schema = {"type": "object", "required": required, "properties": nested_items,
-                      "example": examples}
-        else:
-            schema = {"type": "object", "additionalProperties": {'type': 'object'},
-                      "example": python_data}
-        return schema
+        # any() short-circuits in C on the first wrapped item
+        has_wrapped_items = any(getattr(type(v), '_IS_PARAMETER_TYPE', False)
+                                for v in python_data.values())
+        if not has_wrapped_items:
+            return {"type": "object", "additionalProperties": {'type': 'object'},
+                    "example": python_data}
+        nested_items = {k: v.cached_swagger if getattr(type(v), '_IS_PARAMETER_TYPE', False)
+                        else {'type': 'object'}
+                        for k, v in python_data.items()}
+        examples = {k: nested_items[k]["example"] if getattr(type(v), '_IS_PARAMETER_TYPE', False)
+                    else v
+                    for k, v in python_data.items()}
+        return {"type": "object", "required": list(python_data), "properties": nested_items,
+                "example": examples}
+
+    # Dispatch tables keyed on sample_data_type, built once at class-definition time.
+    _DESERIALIZERS = {
+        datetime.date: _deserialize_date,
+        datetime.datetime: _deserialize_datetime,
+        datetime.time: _deserialize_time,
+        bytes: _deserialize_bytes,
+        bytearray: _deserialize_bytes,
+    }
+
+    _SCHEMA_BUILDERS = {
+        int: _make_scalar_schema_builder("integer", "int64"),
+        bytes: _swagger_for_bytes,
+        range: _swagger_for_range,
+        str: _make_scalar_schema_builder("string"),
+        float: _make_scalar_schema_builder("number", "double"),
+        bool: _make_scalar_schema_builder("boolean"),
+        datetime.date: _swagger_for_date,
+        datetime.datetime: _swagger_for_datetime,
+        datetime.time: _swagger_for_time,
+        bytearray: _swagger_for_bytes,
+        list: _swagger_for_sequence,
+        tuple: _swagger_for_sequence,
+        dict: _swagger_for_dict,
+    }
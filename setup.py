@@ -30,8 +30,6 @@ CLASSIFIERS = [
     'Intended Audience :: Developers',
     'Intended Audience :: System Administrators',
     'Programming Language :: Python :: 3',
-    'Programming Language :: Python :: 3.5',
-    'Programming Language :: Python :: 3.6',
     'Programming Language :: Python :: 3.7',
 ]
 
@@ -47,6 +45,7 @@ setup(
     license=LICENSE,
     install_requires=DEPENDENCIES,
     extras_require=EXTRAS,
+    python_requires='>=3.7',
     packages=find_packages(exclude=['tests', 'tests.*']),
     include_package_data=True
 )
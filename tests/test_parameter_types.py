@@ -2,12 +2,16 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # ---------------------------------------------------------
 
+import datetime
+
 import numpy as np
 import pandas as pd
+import pytz
 
 from pandas.util.testing import assert_frame_equal
 from pyspark.sql.session import SparkSession
 
+from inference_schema.parameter_types.standard_py_parameter_type import StandardPythonParameterType
 from .resources.decorated_function_samples import numpy_func, pandas_func, pandas_datetime_func, spark_func,\
     standard_py_func, nested_func
 
@@ -87,6 +91,28 @@ class TestStandardPythonParameterType(object):
         result = standard_py_func(**standard_input)
         assert age == result
 
+    def test_date_deserialization(self):
+        date_param = StandardPythonParameterType(datetime.date(2020, 5, 17))
+        result = date_param.deserialize_input('2020-05-17')
+        assert type(result) is datetime.date
+        assert result == datetime.date(2020, 5, 17)
+
+    def test_datetime_deserialization(self):
+        datetime_param = StandardPythonParameterType(datetime.datetime(2020, 5, 17))
+        result = datetime_param.deserialize_input('2020-05-17T12:30:05.000123+00:00')
+        assert result == datetime.datetime(2020, 5, 17, 12, 30, 5, 123, pytz.utc)
+
+        result = datetime_param.deserialize_input('May 17 2020 12:30PM')
+        assert result == datetime.datetime(2020, 5, 17, 12, 30)
+
+    def test_time_deserialization(self):
+        time_param = StandardPythonParameterType(datetime.time(12, 30))
+        result = time_param.deserialize_input('12:30:05.000123+00:00')
+        assert result == datetime.time(12, 30, 5, 123, pytz.utc)
+
+        result = time_param.deserialize_input('2020-05-17 12:30:05')
+        assert result == datetime.time(12, 30, 5)
+
 
 class TestNestedType(object):
 